@@ -1,9 +1,18 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
+import sys
 from pathlib import Path
+from typing import TextIO
 
+import numpy as np
 
 DIAL_SIZE = 100
 START = 50
+CHUNK_SIZE = 1 << 20
 
 
 def step(pos: int, rot: str, amount: int) -> int:
@@ -11,6 +20,66 @@ def step(pos: int, rot: str, amount: int) -> int:
     return (pos + delta) % DIAL_SIZE
 
 
+def count_zero_crossings(pos: int, rot: str, amount: int) -> int:
+    # turning left from pos is turning right from the mirrored position
+    offset = pos if rot == "R" else (DIAL_SIZE - pos) % DIAL_SIZE
+    return (offset + amount) // DIAL_SIZE
+
+
+def parse_rotations(rows: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    rights = np.array([row[0] == "R" for row in rows], dtype=bool)
+    amounts = [int(row[1:]) for row in rows]
+    try:
+        return rights, np.array(amounts, dtype=np.int64)
+    except OverflowError:
+        # past int64, keep exact Python ints
+        return rights, np.array(amounts, dtype=object)
+
+
+def count_zero_crossings_batch(
+    rights: np.ndarray, amounts: np.ndarray, start: int = START
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the end position and zero-crossings of every rotation."""
+    # reduce before accumulating or adding so huge amounts can't overflow int64
+    deltas = (np.where(rights, amounts, -amounts) % DIAL_SIZE).astype(np.int64)
+    ends = (start + np.cumsum(deltas)) % DIAL_SIZE
+    starts = np.concatenate(([start], ends[:-1]))
+    offsets = np.where(rights, starts, (DIAL_SIZE - starts) % DIAL_SIZE)
+    return ends, amounts // DIAL_SIZE + (offsets + amounts % DIAL_SIZE) // DIAL_SIZE
+
+
+def exact_sum(values: np.ndarray) -> int:
+    """Sum non-negative values, in int64 only while the total must fit."""
+    if values.dtype != object and (
+        not len(values) or int(values.max()) <= np.iinfo(np.int64).max // len(values)
+    ):
+        return int(values.sum())
+    return int(values.sum(dtype=object))
+
+
+def solve_batch(data: str) -> tuple[int, int]:
+    ends, crossings = count_zero_crossings_batch(*parse_rotations(data.split()))
+    return int(np.count_nonzero(ends == 0)), exact_sum(crossings)
+
+
+def solve_stream(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> tuple[int, int]:
+    """Replay a rotation log chunk by chunk, keeping only one chunk in memory."""
+    pos, part1, part2 = START, 0, 0
+    tail = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        rows = (tail + chunk).split()
+        # the last record may continue in the next chunk
+        tail = rows.pop() if chunk and rows and not chunk[-1].isspace() else ""
+        if rows:
+            ends, crossings = count_zero_crossings_batch(*parse_rotations(rows), pos)
+            pos = int(ends[-1])
+            part1 += int(np.count_nonzero(ends == 0))
+            part2 += exact_sum(crossings)
+        if not chunk:
+            return part1, part2
+
+
 def solve_part1(data: str) -> int:
     pos, pw = START, 0
     for row in data.splitlines():
@@ -25,25 +94,33 @@ def solve_part2(data: str) -> int:
     pos, pw = START, 0
     for row in data.splitlines():
         rot, num = row[0], int(row[1:])
-        for _ in range(num):
-            pos = step(pos, rot, 1)
-            if pos == 0:
-                pw += 1
+        pw += count_zero_crossings(pos, rot, num)
+        pos = step(pos, rot, num)
     return pw
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument(
+        "--stream", action="store_true", help="replay in chunks, '-' reads stdin"
+    )
     args = parser.parse_args()
 
-    input_text = Path(args.path).read_text().strip()
+    if args.stream:
+        if str(args.path) == "-":
+            part1_result, part2_result = solve_stream(sys.stdin)
+        else:
+            with open(args.path) as f:
+                part1_result, part2_result = solve_stream(f)
+    else:
+        input_text = Path(args.path).read_text().strip()
+        part1_result = solve_part1(input_text)
+        part2_result = solve_part2(input_text)
 
-    part1_result = solve_part1(input_text)
     print(f"Part 1: {part1_result}")
     assert part1_result == 1055
 
-    part2_result = solve_part2(input_text)
     print(f"Part 2: {part2_result}")
     assert part2_result == 6386
 
@@ -1,67 +1,109 @@
 import argparse
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from math import prod
 from pathlib import Path
 
 
-def has_repeated_halves(s: str) -> bool:
-    n = len(s)
-    if n % 2:
-        return False
+def prime_factors(n: int) -> list[int]:
+    return [
+        p for p in range(2, n + 1) if n % p == 0 and all(p % q for q in range(2, p))
+    ]
 
-    mid = n // 2
-    first, last = s[:mid], s[mid:]
 
-    if first[0] == "0" or last[0] == "0":
-        return False
+def chunk_sizes(length: int, part2: bool) -> dict[int, int]:
+    """Map chunk size to its inclusion-exclusion sign for IDs of this length."""
+    if not part2:
+        return {} if length % 2 else {length // 2: 1}
 
-    return first == last
+    # an ID built from chunks of two sizes is also built from chunks of their
+    # gcd, so the union over all sizes alternates over sets of prime factors
+    primes = prime_factors(length)
+    sizes = {}
+    for mask in range(1, 1 << len(primes)):
+        chosen = [p for i, p in enumerate(primes) if mask >> i & 1]
+        sizes[length // prod(chosen)] = 1 if len(chosen) % 2 else -1
+    return sizes
 
 
-def has_repeated_chunks(s: str) -> bool:
-    n = len(s)
-    for size in range(1, n // 2 + 1):
-        if n % size != 0:
-            continue
+def chunk_range(lo: int, hi: int, length: int, size: int) -> tuple[int, int, int]:
+    """Return the multiplier and chunk bounds of length-digit IDs in [lo, hi]."""
+    # a chunk repeated length // size times equals chunk * multiplier
+    multiplier = (10**length - 1) // (10**size - 1)
+    first = max(10 ** (size - 1), -(-lo // multiplier))
+    last = min(10**size - 1, hi // multiplier)
+    return multiplier, first, last
 
-        chunk = s[:size]
-        if chunk * (n // size) == s:
-            return True
 
-    return False
+def repeated_sum(lo: int, hi: int, length: int, size: int) -> int:
+    """Sum the length-digit IDs in [lo, hi] made of one repeated size-digit chunk."""
+    multiplier, first, last = chunk_range(lo, hi, length, size)
+    if first > last:
+        return 0
+    return multiplier * (first + last) * (last - first + 1) // 2
 
 
-def solve(data: str, part2: bool = False) -> int:
-    total = 0
-    for row in data.split(","):
-        start, end = map(int, row.split("-"))
-        for i in range(start, end + 1):
-            s = str(i)
-            if has_repeated_halves(s):
-                total += i
-            elif part2 and has_repeated_chunks(s):
-                total += i
-    return total
+def iter_invalid_ids(lo: int, hi: int, part2: bool = False) -> Iterator[int]:
+    """Yield the invalid IDs in [lo, hi] in ascending order."""
+    for length in range(len(str(lo)), len(str(hi)) + 1):
+        ids = set()
+        for size in chunk_sizes(length, part2):
+            multiplier, first, last = chunk_range(lo, hi, length, size)
+            ids.update(chunk * multiplier for chunk in range(first, last + 1))
+        yield from sorted(ids)
 
 
-def solve_part1(data: str) -> int:
-    return solve(data)
+def invalid_id_sum(lo: int, hi: int, part2: bool = False) -> int:
+    return sum(
+        sign * repeated_sum(lo, hi, length, size)
+        for length in range(len(str(lo)), len(str(hi)) + 1)
+        for size, sign in chunk_sizes(length, part2).items()
+    )
 
 
-def solve_part2(data: str) -> int:
-    return solve(data, part2=True)
+def batch_sum(ranges: list[tuple[int, int]], part2: bool = False) -> int:
+    return sum(invalid_id_sum(start, end, part2) for start, end in ranges)
+
+
+def parse_ranges(data: str) -> list[tuple[int, int]]:
+    return [tuple(map(int, row.split("-"))) for row in data.split(",")]
+
+
+def solve(data: str, part2: bool = False, workers: int = 1) -> int:
+    ranges = parse_ranges(data)
+    if workers <= 1:
+        return batch_sum(ranges, part2)
+
+    # a range is only a handful of closed-form sums, so send each worker a
+    # few contiguous batches rather than paying a round trip per range
+    size = max(1, -(-len(ranges) // (workers * 4)))
+    batches = [ranges[i : i + size] for i in range(0, len(ranges), size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(batch_sum, batches, repeat(part2, len(batches))))
+
+
+def solve_part1(data: str, workers: int = 1) -> int:
+    return solve(data, workers=workers)
+
+
+def solve_part2(data: str, workers: int = 1) -> int:
+    return solve(data, part2=True, workers=workers)
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument("--workers", type=int, default=1)
     args = parser.parse_args()
 
     input_text = Path(args.path).read_text().strip()
 
-    part1_result = solve_part1(input_text)
+    part1_result = solve_part1(input_text, args.workers)
     print(f"Part 1: {part1_result}")
     assert part1_result == 31839939622
 
-    part2_result = solve_part2(input_text)
+    part2_result = solve_part2(input_text, args.workers)
     print(f"Part 2: {part2_result}")
     assert part2_result == 41662374059
 
@@ -1,5 +1,16 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
+from collections.abc import Iterable
 from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+BLOCK_ROWS = 10_000
 
 
 def find_largest_k_digit_number(row: str, k: int) -> str:
@@ -17,12 +28,126 @@ def find_largest_k_digit_number(row: str, k: int) -> str:
     return "".join(stack[:k])
 
 
+def load_digit_matrix(data: str) -> np.ndarray:
+    """Parse equal-length rows of digits into a (rows, width) uint8 matrix."""
+    if not data:
+        return np.zeros((0, 0), dtype=np.uint8)
+    width = data.find("\n") if "\n" in data else len(data)
+    raw = np.frombuffer((data + "\n").encode("ascii"), dtype=np.uint8)
+    if raw.size % (width + 1) or (raw[width :: width + 1] != ord("\n")).any():
+        raise ValueError("rows must all have the same length")
+    return raw.reshape(-1, width + 1)[:, :width] - ord("0")
+
+
+def largest_k_digit_total(digits: np.ndarray, k: int) -> int:
+    """Sum the largest k-digit subsequence of every row of a digit matrix."""
+    rows, width = digits.shape
+    if not rows:
+        return 0
+    if k > width:
+        raise ValueError(f"k={k} is greater than the row length ({width})")
+    cols = np.arange(width)
+    signed = digits.astype(np.int8)
+    pos = np.zeros(rows, dtype=np.intp)
+    total = 0
+    for i in range(k):
+        # pick the leftmost max digit that still leaves room for the rest
+        window = (cols >= pos[:, None]) & (cols <= width - k + i)
+        best = np.where(window, signed, -1).argmax(axis=1)
+        total += int(digits[np.arange(rows), best].sum(dtype=np.int64)) * 10 ** (
+            k - 1 - i
+        )
+        pos = best + 1
+    return total
+
+
+def next_occurrence(digits: np.ndarray) -> np.ndarray:
+    """Return table[row, j, d], the first index >= j holding digit d (or width)."""
+    rows, width = digits.shape
+    table = np.full((rows, width + 1, 10), width, dtype=np.min_scalar_type(width))
+    row_ids = np.arange(rows)
+    for j in range(width - 1, -1, -1):
+        table[:, j] = table[:, j + 1]
+        table[row_ids, j, digits[:, j]] = j
+    return table
+
+
+def query_next_occurrence(table: np.ndarray, k: int) -> int:
+    """Sum the largest k-digit subsequence of every row in O(k * 10) steps."""
+    rows, width = table.shape[0], table.shape[1] - 1
+    if k > width:
+        raise ValueError(f"k={k} is greater than the row length ({width})")
+    row_ids = np.arange(rows)
+    pos = np.zeros(rows, dtype=np.intp)
+    total = 0
+    for i in range(k):
+        limit = width - k + i
+        chosen = np.full(rows, -1, dtype=np.int64)
+        next_pos = pos
+        # the highest digit still reachable within the window wins
+        for d in range(9, -1, -1):
+            idx = table[row_ids, pos, d]
+            take = (chosen < 0) & (idx <= limit)
+            chosen[take] = d
+            next_pos = np.where(take, idx + 1, next_pos)
+        total += int(chosen.sum()) * 10 ** (k - 1 - i)
+        pos = next_pos
+    return total
+
+
+def solve_many(data: str, ks: Iterable[int]) -> dict[int, int]:
+    """Total the largest k-digit values for several k from one parse of the banks."""
+    ks = list(dict.fromkeys(ks))  # a repeated k is answered once
+    try:
+        digits = load_digit_matrix(data)
+    except ValueError:
+        # ragged rows, fall back to the per-row scan
+        rows = data.splitlines()
+        return {
+            k: sum(int(find_largest_k_digit_number(row, k)) for row in rows) for k in ks
+        }
+
+    totals = dict.fromkeys(ks, 0)
+    for start in range(0, len(digits), BLOCK_ROWS):
+        table = next_occurrence(digits[start : start + BLOCK_ROWS])
+        for k in ks:
+            totals[k] += query_next_occurrence(table, k)
+    return totals
+
+
 def solve(data: str, part2: bool = False) -> int:
-    numbers = []
-    for row in data.splitlines():
-        best = find_largest_k_digit_number(row, 12 if part2 else 2)
-        numbers.append(best)
-    return sum(int(num) for num in numbers)
+    k = 12 if part2 else 2
+    try:
+        digits = load_digit_matrix(data)
+    except ValueError:
+        # ragged rows, fall back to the per-row scan
+        return sum(
+            int(find_largest_k_digit_number(row, k)) for row in data.splitlines()
+        )
+    return largest_k_digit_total(digits, k)
+
+
+def benchmark(rows: int, width: int = 100) -> None:
+    rng = np.random.default_rng(0)
+    data = "\n".join(
+        "".join(map(str, row)) for row in rng.integers(1, 10, size=(rows, width))
+    )
+    for k in (2, 12):
+        start = perf_counter()
+        expected = sum(
+            int(find_largest_k_digit_number(row, k)) for row in data.splitlines()
+        )
+        scalar = perf_counter() - start
+        start = perf_counter()
+        assert largest_k_digit_total(load_digit_matrix(data), k) == expected
+        vectorized = perf_counter() - start
+        start = perf_counter()
+        assert solve_many(data, [k]) == {k: expected}
+        tables = perf_counter() - start
+        print(
+            f"k={k:>2}: per-row {scalar:.2f}s, matrix {vectorized:.2f}s,"
+            f" next-occurrence {tables:.2f}s"
+        )
 
 
 def solve_part1(data: str) -> int:
@@ -36,19 +161,25 @@ def solve_part2(data: str) -> int:
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument("--bench", type=int, metavar="ROWS", help="run a benchmark")
     args = parser.parse_args()
 
+    if args.bench:
+        benchmark(args.bench)
+        return
+
     input_text = Path(args.path).read_text().strip()
 
-    part1_result = solve_part1(input_text)
+    totals = solve_many(input_text, (2, 12))
+
+    part1_result = totals[2]
     print(f"Part 1: {part1_result}")
     assert part1_result == 17330
 
-    part2_result = solve_part2(input_text)
+    part2_result = totals[12]
     print(f"Part 2: {part2_result}")
     assert part2_result == 171518260283767
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,7 +1,14 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
 from pathlib import Path
 from typing import NamedTuple
 
+import numpy as np
+
 ROLL = "@"
 MAX_ROLLS_ADJACENT = 4
 
@@ -23,44 +30,60 @@ DIRECTIONS = [
 ]
 
 
-def load_grid(data: str) -> dict[Position, str]:
-    grid = {}
-    for y, line in enumerate(data.splitlines()):
-        for x, char in enumerate(line):
-            grid[Position(x, y)] = char
-    return grid
+def load_grid(data: str) -> np.ndarray:
+    """Return a zero-padded uint8 grid holding 1 where there is a roll."""
+    width = data.find("\n") if "\n" in data else len(data)
+    raw = np.frombuffer((data + "\n").encode("ascii"), dtype=np.uint8)
+    rolls = raw.reshape(-1, width + 1)[:, :width] == ord(ROLL)
+    return np.pad(rolls.astype(np.uint8), 1)
+
+
+def neighbor_counts(grid: np.ndarray) -> np.ndarray:
+    """Count the adjacent rolls of every cell of a padded grid."""
+    height, width = grid.shape[0] - 2, grid.shape[1] - 2
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for d in DIRECTIONS:
+        counts += grid[1 + d.y : 1 + d.y + height, 1 + d.x : 1 + d.x + width]
+    return counts
 
 
-def get_adjacent_rolls(grid: dict[Position, str], pos: Position) -> int:
-    return sum(grid.get(Position(pos.x + d.x, pos.y + d.y)) == ROLL for d in DIRECTIONS)
+def accessible_rolls(grid: np.ndarray) -> np.ndarray:
+    return (grid[1:-1, 1:-1] == 1) & (neighbor_counts(grid) < MAX_ROLLS_ADJACENT)
 
 
 def solve_part1(data: str) -> int:
-    grid = load_grid(data)
-    return sum(
-        char == ROLL and get_adjacent_rolls(grid, pos) < MAX_ROLLS_ADJACENT
-        for pos, char in grid.items()
-    )
+    return int(np.count_nonzero(accessible_rolls(load_grid(data))))
+
+
+def peel_waves(grid: np.ndarray) -> list[int]:
+    """Clear accessible rolls wave by wave, returning how many each wave removed."""
+    width = grid.shape[1]
+    offsets = [d.y * width + d.x for d in DIRECTIONS]
+    rolls = bytearray(grid.tobytes())
+    counts = bytearray(np.pad(neighbor_counts(grid), 1).tobytes())
+    wave = np.flatnonzero(np.pad(accessible_rolls(grid), 1)).tolist()
+
+    removed = []
+    while wave:
+        removed.append(len(wave))
+        for i in wave:
+            rolls[i] = 0
+
+        # only the neighbours of cleared rolls can become accessible
+        next_wave = []
+        for i in wave:
+            for offset in offsets:
+                j = i + offset
+                if rolls[j]:
+                    counts[j] -= 1
+                    if counts[j] == MAX_ROLLS_ADJACENT - 1:
+                        next_wave.append(j)
+        wave = next_wave
+    return removed
 
 
 def solve_part2(data: str) -> int:
-    grid = load_grid(data)
-    total = 0
-    while True:
-        to_clear = []
-        for pos, char in grid.items():
-            if char != ROLL:
-                continue
-            if get_adjacent_rolls(grid, pos) < MAX_ROLLS_ADJACENT:
-                to_clear.append(pos)
-
-        if not to_clear:
-            break
-
-        for pos in to_clear:
-            grid[pos] = "."
-        total += len(to_clear)
-    return total
+    return sum(peel_waves(load_grid(data)))
 
 
 def main():
@@ -1,50 +1,173 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import islice
 from pathlib import Path
 
+import numpy as np
+
 
 def parse_ranges(block: str) -> list[tuple[int, int]]:
     return [tuple(map(int, line.split("-"))) for line in block.splitlines()]
 
 
-def ingredient_in_range(ingredient: int, ranges: list[tuple[int, int]]) -> bool:
-    return any(start <= ingredient <= end for start, end in ranges)
-
-
-def solve_part1(data: str) -> int:
-    range_block, ingredient_block = data.split("\n\n")
-    ranges = parse_ranges(range_block)
-    ingredients = [int(x) for x in ingredient_block.splitlines()]
-    return sum(ingredient_in_range(in_, ranges) for in_ in ingredients)
-
-
-def solve_part2(data: str) -> int:
-    ranges_block = data.split("\n\n")[0]
-    ranges = sorted(parse_ranges(ranges_block))
-
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
     covered_end = -1
-    total = 0
 
-    for start, end in ranges:
+    for start, end in sorted(ranges):
         if end <= covered_end:
             # fully covered, skip
             continue
-        if start <= covered_end:
-            # trim the subrange already covered
-            start = covered_end + 1
+        if merged and start <= covered_end + 1:
+            # overlaps or touches the previous range, extend it
+            start = merged.pop()[0]
 
-        total += end + 1 - start
+        merged.append((start, end))
         covered_end = end
 
-    return total
+    return merged
+
+
+@dataclass(frozen=True)
+class IntervalIndex:
+    starts: list[int]  # sorted, disjoint
+    ends: list[int]  # inclusive
+
+    @classmethod
+    def from_ranges(cls, ranges: list[tuple[int, int]]) -> "IntervalIndex":
+        merged = merge_ranges(ranges)
+        return cls([start for start, _ in merged], [end for _, end in merged])
+
+    @cached_property
+    def start_array(self) -> np.ndarray:
+        return np.array(self.starts, dtype=np.int64)
+
+    @cached_property
+    def end_array(self) -> np.ndarray:
+        return np.array(self.ends, dtype=np.int64)
+
+    @property
+    def size(self) -> int:
+        return sum(end + 1 - start for start, end in zip(self.starts, self.ends))
+
+    def __contains__(self, ingredient: int) -> bool:
+        i = bisect_right(self.starts, ingredient) - 1
+        return i >= 0 and ingredient <= self.ends[i]
+
+    def contains_many(self, ingredients: np.ndarray) -> np.ndarray:
+        if not self.starts:
+            return np.zeros(len(ingredients), dtype=bool)
+        i = np.searchsorted(self.start_array, ingredients, side="right") - 1
+        return (i >= 0) & (ingredients <= self.end_array[np.maximum(i, 0)])
+
+
+class IntervalSet:
+    """Mutable set of disjoint ranges that keeps its covered size up to date."""
+
+    def __init__(self, ranges: Iterable[tuple[int, int]] = ()) -> None:
+        self.starts: list[int] = []  # sorted, disjoint, never touching
+        self.ends: list[int] = []  # inclusive
+        self.size = 0
+        for start, end in ranges:
+            self.add(start, end)
+
+    def _replace(self, lo: int, hi: int, pieces: list[tuple[int, int]]) -> None:
+        self.size -= sum(
+            e + 1 - s for s, e in zip(self.starts[lo:hi], self.ends[lo:hi])
+        )
+        self.size += sum(e + 1 - s for s, e in pieces)
+        self.starts[lo:hi] = [s for s, _ in pieces]
+        self.ends[lo:hi] = [e for _, e in pieces]
+
+    def add(self, start: int, end: int) -> None:
+        # absorb every range overlapping or touching [start, end]
+        lo = bisect_left(self.ends, start - 1)
+        hi = bisect_right(self.starts, end + 1)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self._replace(lo, hi, [(start, end)])
+
+    def remove(self, start: int, end: int) -> None:
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo >= hi:
+            return
+        # keep whatever sticks out on either side
+        pieces = []
+        if self.starts[lo] < start:
+            pieces.append((self.starts[lo], start - 1))
+        if self.ends[hi - 1] > end:
+            pieces.append((end + 1, self.ends[hi - 1]))
+        self._replace(lo, hi, pieces)
+
+    def __contains__(self, ingredient: int) -> bool:
+        i = bisect_right(self.starts, ingredient) - 1
+        return i >= 0 and ingredient <= self.ends[i]
+
+    def freeze(self) -> IntervalIndex:
+        return IntervalIndex(self.starts[:], self.ends[:])
+
+
+def parse_updates(block: str) -> list[tuple[str, int, int]]:
+    """Parse lines like "+3-5" (add) and "-3-5" (remove)."""
+    updates = []
+    for line in block.splitlines():
+        start, end = map(int, line[1:].split("-"))
+        updates.append((line[0], start, end))
+    return updates
+
+
+def replay(
+    intervals: IntervalSet, updates: Iterable[tuple[str, int, int]], batch_size: int
+) -> Iterator[int]:
+    """Apply updates in batches, yielding the covered size after each batch."""
+    updates = iter(updates)
+    while batch := list(islice(updates, batch_size)):
+        for op, start, end in batch:
+            if op == "+":
+                intervals.add(start, end)
+            else:
+                intervals.remove(start, end)
+        yield intervals.size
+
+
+def solve_part1(data: str) -> int:
+    range_block, ingredient_block = data.split("\n\n")
+    index = IntervalIndex.from_ranges(parse_ranges(range_block))
+    ingredients = np.array(ingredient_block.split(), dtype=np.int64)
+    return int(np.count_nonzero(index.contains_many(ingredients)))
+
+
+def solve_part2(data: str) -> int:
+    ranges_block = data.split("\n\n")[0]
+    return IntervalIndex.from_ranges(parse_ranges(ranges_block)).size
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument("--replay", metavar="UPDATES", help="file of +a-b/-a-b lines")
+    parser.add_argument("--batch", type=int, default=1_000)
     args = parser.parse_args()
 
     input_text = Path(args.path).read_text().strip()
 
+    if args.replay:
+        intervals = IntervalSet(parse_ranges(input_text.split("\n\n")[0]))
+        updates = parse_updates(Path(args.replay).read_text().strip())
+        for i, covered in enumerate(replay(intervals, updates, args.batch), 1):
+            print(f"Batch {i}: {covered}")
+        return
+
     part1_result = solve_part1(input_text)
     print(f"Part 1: {part1_result}")
     assert part1_result == 623
@@ -1,9 +1,26 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
+import mmap
+import re
+from collections.abc import Iterator
 from pathlib import Path
 from math import prod
+from operator import add, mul
+from time import perf_counter
 
+import numpy as np
 
-def solve_part1(data: str) -> int:
+# float64 estimates at or above this may have overflowed int64
+INT64_SAFE = 2**62
+OPERATOR = re.compile(rb"[*+]")
+NON_BLANK = re.compile(rb"\S")
+
+
+def solve_part1_scalar(data: str) -> int:
     lines = data.splitlines()
     grid = [[int(x) for x in line.split()] for line in lines[:-1]]
     grid_transposed = list(zip(*grid))
@@ -13,6 +30,56 @@ def solve_part1(data: str) -> int:
     )
 
 
+def load_numbers(lines: list[str]) -> np.ndarray:
+    """Parse the numeric rows into an int64 matrix, or object if they don't fit."""
+    text = " ".join(lines)
+    values = np.fromstring(text, dtype=np.int64, sep=" ")
+    # numbers too big for int64 saturate to its max
+    if (values == np.iinfo(np.int64).max).any():
+        values = np.array([int(token) for token in text.split()], dtype=object)
+    return values.reshape(len(lines), -1)
+
+
+def reduce_columns(grid: np.ndarray, is_mul: np.ndarray) -> list[int]:
+    results = np.where(is_mul, np.prod(grid, axis=0), np.sum(grid, axis=0))
+    if grid.dtype == object:
+        return results.tolist()
+
+    # redo the columns whose float estimate says int64 wrapped with exact ints
+    floats = grid.astype(np.float64)
+    estimate = np.where(is_mul, np.prod(floats, axis=0), np.sum(floats, axis=0))
+    results = results.tolist()
+    for col in np.flatnonzero(np.abs(estimate) >= INT64_SAFE):
+        nums = grid[:, col].tolist()
+        results[col] = prod(nums) if is_mul[col] else sum(nums)
+    return results
+
+
+def solve_part1(data: str) -> int:
+    *lines, ops = data.splitlines()
+    symbols = np.frombuffer(ops.encode("ascii"), dtype=np.uint8)
+    is_mul = symbols[symbols != ord(" ")] == ord("*")
+    return sum(reduce_columns(load_numbers(lines), is_mul))
+
+
+def benchmark(columns: int, rows: int = 4) -> None:
+    rng = np.random.default_rng(0)
+    grid = rng.integers(1, 10_000, size=(rows, columns))
+    ops = rng.choice(["*", "+"], size=columns)
+    data = "\n".join([*(" ".join(map(str, row)) for row in grid), " ".join(ops)])
+
+    start = perf_counter()
+    expected = solve_part1_scalar(data)
+    scalar = perf_counter() - start
+    start = perf_counter()
+    assert solve_part1(data) == expected
+    vectorized = perf_counter() - start
+    print(
+        f"{columns} columns: python {scalar:.3f}s, numpy {vectorized:.3f}s"
+        f" ({scalar / vectorized:.1f}x)"
+    )
+
+
 def solve_part2(data: str) -> int:
     lines = data.splitlines()
     max_width = max(len(line) for line in lines)
@@ -35,18 +102,81 @@ def solve_part2(data: str) -> int:
     return total
 
 
+def line_spans(mm: mmap.mmap) -> list[tuple[int, int]]:
+    spans = []
+    start = 0
+    while start < len(mm):
+        end = mm.find(b"\n", start)
+        if end == -1:
+            end = len(mm)
+        if NON_BLANK.search(mm, start, end):
+            spans.append((start, end))
+        start = end + 1
+    return spans
+
+
+def problem_blocks(
+    mm: mmap.mmap, ops: tuple[int, int], width: int
+) -> Iterator[tuple[int, int, bytes]]:
+    """Yield (first column, end column, operator) of each problem, left to right."""
+    start = op = None
+    for match in OPERATOR.finditer(mm, *ops):
+        col = match.start() - ops[0]
+        if op is not None:
+            yield start, col, op
+        start, op = col, match.group()
+    if op is not None:
+        yield start, width, op
+
+
+def evaluate_file(path: str | Path, part2: bool = False) -> int:
+    """Evaluate a memory-mapped worksheet one problem block at a time."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        *rows, ops = line_spans(mm)
+        width = max(end - start for start, end in rows)
+        total = 0
+        for first, last, op in problem_blocks(mm, ops, width):
+            combine, acc = (mul, 1) if op == b"*" else (add, 0)
+            block = [mm[start + first : min(start + last, end)] for start, end in rows]
+            if part2:
+                # one number per column, read top to bottom
+                numbers = (
+                    b"".join(row[col : col + 1] for row in block)
+                    for col in range(last - first)
+                )
+            else:
+                numbers = iter(block)
+            for num in numbers:
+                if num.strip():
+                    acc = combine(acc, int(num))
+            total += acc
+        return total
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument(
+        "--stream", action="store_true", help="memory-map the file, one block at a time"
+    )
+    parser.add_argument("--bench", type=int, metavar="COLUMNS", help="benchmark part 1")
     args = parser.parse_args()
 
-    input_text = Path(args.path).read_text().strip()
+    if args.bench:
+        benchmark(args.bench)
+        return
+
+    if args.stream:
+        part1_result = evaluate_file(args.path)
+        part2_result = evaluate_file(args.path, part2=True)
+    else:
+        input_text = Path(args.path).read_text().strip()
+        part1_result = solve_part1(input_text)
+        part2_result = solve_part2(input_text)
 
-    part1_result = solve_part1(input_text)
     print(f"Part 1: {part1_result}")
     assert part1_result == 4412382293768
 
-    part2_result = solve_part2(input_text)
     print(f"Part 2: {part2_result}")
     assert part2_result == 7858808482092
 
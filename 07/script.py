@@ -1,37 +1,123 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
-from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
 
-def load_grid(data: str) -> list[list[str]]:
-    return [list(line.strip()) for line in data.splitlines()]
+# promote to exact ints before a count could pass int64 (a column gains at
+# most its own beams plus both neighbours' splits per row)
+INT64_SAFE = 2**63 // 3
 
 
-def find_char_in_row(row: list[str], char: str) -> int:
+def find_char_in_row(row: str, char: str) -> int:
     try:
         return row.index(char)
     except ValueError:
         raise ValueError(f"Character {char!r} not found in row") from None
 
 
-def solve(data: str, part2: bool = False) -> int:
-    grid = load_grid(data)
-    start_col = find_char_in_row(grid[0], "S")
+def splitter_mask(row: str, width: int) -> np.ndarray:
+    """Mark the '^' cells of a row, padded by one column on each side."""
+    cells = np.frombuffer(row.strip().encode("ascii")[:width], dtype=np.uint8)
+    splitters = np.zeros(width + 2, dtype=bool)
+    splitters[1 : len(cells) + 1] = cells == ord("^")
+    return splitters
+
 
-    beams = Counter({start_col: 1})
+def propagate(rows: Iterable[str]) -> tuple[int, int]:
+    """Stream rows through the manifold, returning (splits, timelines)."""
+    rows = iter(rows)
+    first = next(rows).strip()
+    width = len(first)
+
+    # one column of padding either side so split beams never fall off
+    beams = np.zeros(width + 2, dtype=np.int64)
+    beams[find_char_in_row(first, "S") + 1] = 1
     total_splits = 0
 
-    for row in grid[1:]:
-        new_beams = Counter()
-        for col, n in beams.items():
-            if row[col] == "^":
-                total_splits += 1
-                for nc in (col - 1, col + 1):
-                    new_beams[nc] += n
-            else:
-                new_beams[col] += n
-        beams = new_beams
-    return sum(beams.values()) if part2 else total_splits
+    for row in rows:
+        hit = splitter_mask(row, width) & (beams > 0)
+        total_splits += int(np.count_nonzero(hit))
+        if beams.dtype != object and beams.max() >= INT64_SAFE:
+            beams = beams.astype(object)
+
+        moved = np.where(hit, beams, 0)
+        beams = np.where(hit, 0, beams)
+        beams[:-1] += moved[1:]
+        beams[1:] += moved[:-1]
+    # columns fit in int64 but their total may not
+    return total_splits, int(beams.sum(dtype=object))
+
+
+@dataclass(frozen=True)
+class EntryTable:
+    timelines: list[int]  # per entry column
+    splits: list[int]  # per entry column
+    exits: list[int]  # bitmask of exit columns, bit 0 is the left padding
+
+    def exit_columns(self, col: int) -> list[int]:
+        mask = self.exits[col]
+        return [i - 1 for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+def entry_table(rows: Iterable[str]) -> EntryTable:
+    """Answer every entry column at once with one bottom-up pass over the rows."""
+    rows = iter(rows)
+    width = len(next(rows).strip())
+    masks = [splitter_mask(row, width) for row in rows]
+
+    # per padded column: timelines, splitters reached (as bits) and exit columns
+    timelines = [1] * (width + 2)
+    reached = [0] * (width + 2)
+    exits = [1 << col for col in range(width + 2)]
+    splitter_id = 0
+
+    for mask in reversed(masks):
+        # splitters read the row below, so snapshot it before updating
+        next_timelines, next_reached, next_exits = timelines[:], reached[:], exits[:]
+        for col in np.flatnonzero(mask).tolist():
+            left, right = col - 1, col + 1
+            timelines[col] = next_timelines[left] + next_timelines[right]
+            reached[col] = 1 << splitter_id | next_reached[left] | next_reached[right]
+            exits[col] = next_exits[left] | next_exits[right]
+            splitter_id += 1
+
+    return EntryTable(
+        timelines=timelines[1:-1],
+        splits=[r.bit_count() for r in reached[1:-1]],
+        exits=exits[1:-1],
+    )
+
+
+def splitter_pyramid(rows: int, width: int = 141) -> str:
+    """A full pyramid of splitters under S, doubling the timelines every row."""
+    centre = width // 2
+    lines = ["." * centre + "S" + "." * (width - centre - 1)]
+    for row in range(rows):
+        cells = ["."] * width
+        for col in range(centre - row, centre + row + 1, 2):
+            cells[col] = "^"
+        lines += ["".join(cells), "." * width]
+    return "\n".join(lines)
+
+
+def check_pyramids() -> None:
+    for rows in (63, 64):
+        data = splitter_pyramid(rows)
+        assert solve(data, part2=True) == 2**rows, rows
+        assert solve(data) == rows * (rows + 1) // 2, rows
+    print("Pyramids: ok")
+
+
+def solve(data: str, part2: bool = False) -> int:
+    total_splits, timelines = propagate(data.splitlines())
+    return timelines if part2 else total_splits
 
 
 def solve_part1(data: str) -> int:
@@ -45,15 +131,29 @@ def solve_part2(data: str) -> int:
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument(
+        "--stream", action="store_true", help="read rows from the file one at a time"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="check exact counts on splitter pyramids"
+    )
     args = parser.parse_args()
 
-    input_text = Path(args.path).read_text().strip()
+    if args.check:
+        check_pyramids()
+        return
+
+    if args.stream:
+        with open(args.path) as f:
+            part1_result, part2_result = propagate(line for line in f if line.strip())
+    else:
+        input_text = Path(args.path).read_text().strip()
+        part1_result = solve_part1(input_text)
+        part2_result = solve_part2(input_text)
 
-    part1_result = solve_part1(input_text)
     print(f"Part 1: {part1_result}")
     assert part1_result == 1651
 
-    part2_result = solve_part2(input_text)
     print(f"Part 2: {part2_result}")
     assert part2_result == 108924003331749
 
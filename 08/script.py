@@ -1,9 +1,158 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
+import heapq
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Iterator
+from itertools import combinations, product
 from pathlib import Path
 from math import dist, prod
-from itertools import combinations
+from time import perf_counter
+
+import numpy as np
 
 NUM_ITERATIONS = 1_000
+BLOCK = 1_024
+# sorting every pair as Python tuples is only benchmarked up to this many pairs
+BASELINE_MAX_PAIRS = 5_000_000
+
+Coord = tuple[int, int, int]
+
+
+class UnionFind:
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.components = n
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            # path halving
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> bool:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.components -= 1
+        return True
+
+    def component_sizes(self) -> list[int]:
+        return [self.size[i] for i in range(len(self.parent)) if self.parent[i] == i]
+
+
+def dist2(a: Coord, b: Coord) -> int:
+    return sum((p - q) ** 2 for p, q in zip(a, b))
+
+
+def pairs_within(coords: list[Coord], radius: int) -> Iterator[tuple[int, int, int]]:
+    """Yield (dist2, i, j) with i < j for every pair at most radius apart."""
+    buckets = defaultdict(list)
+    for i, (x, y, z) in enumerate(coords):
+        buckets[x // radius, y // radius, z // radius].append(i)
+
+    limit = radius * radius
+    for (bx, by, bz), members in buckets.items():
+        for dx, dy, dz in product((-1, 0, 1), repeat=3):
+            for j in buckets.get((bx + dx, by + dy, bz + dz), ()):
+                for i in members:
+                    if i < j and (d := dist2(coords[i], coords[j])) <= limit:
+                        yield d, i, j
+
+
+def iter_edges(coords: list[Coord]) -> Iterator[tuple[int, int, int]]:
+    """Yield (dist2, i, j) for all pairs, shortest first, a shell at a time."""
+    spans = [max(axis) - min(axis) for axis in zip(*coords)]
+    max_dist2 = sum(span * span for span in spans)
+    # start around the mean spacing and double until every pair is covered
+    radius = max(1, int(max(spans) / len(coords) ** (1 / 3)))
+    covered = -1
+    while covered < max_dist2:
+        shell = [edge for edge in pairs_within(coords, radius) if edge[0] > covered]
+        heapq.heapify(shell)
+        while shell:
+            yield heapq.heappop(shell)
+        covered = radius * radius
+        radius *= 2
+
+
+def keep_shortest(
+    d2: np.ndarray, i: np.ndarray, j: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Keep the k smallest (d2, i, j) candidates, breaking ties like sorted()."""
+    if len(d2) <= k:
+        return d2, i, j
+    cutoff = d2[np.argpartition(d2, k - 1)[k - 1]]
+    below = np.flatnonzero(d2 < cutoff)
+    tied = np.flatnonzero(d2 == cutoff)
+    tied = tied[np.lexsort((j[tied], i[tied]))[: k - len(below)]]
+    keep = np.concatenate((below, tied))
+    return d2[keep], i[keep], j[keep]
+
+
+def shortest_edges(coords: np.ndarray, k: int) -> list[tuple[int, int, int]]:
+    """Return the k shortest (dist2, i, j) pairs, sorted, one tile at a time."""
+    n = len(coords)
+    best = [np.empty(0, dtype=np.int64) for _ in range(3)]
+    for row in range(0, n, BLOCK):
+        a = coords[row : row + BLOCK]
+        for col in range(row, n, BLOCK):
+            b = coords[col : col + BLOCK]
+            d2 = sum((a[:, None, axis] - b[None, :, axis]) ** 2 for axis in range(3))
+            pick = np.ones(d2.shape, dtype=bool)
+            if row == col:
+                pick = np.triu(pick, 1)
+            if len(best[0]) == k:
+                # nothing longer than the current k-th edge can make the cut
+                pick &= d2 <= best[0].max()
+            i, j = np.nonzero(pick)
+            candidates = (d2[i, j], i + row, j + col)
+            best = keep_shortest(
+                *(np.concatenate(pair) for pair in zip(best, candidates)), k
+            )
+
+    d2, i, j = best
+    order = np.lexsort((j, i, d2))
+    return list(zip(d2[order].tolist(), i[order].tolist(), j[order].tolist()))
+
+
+def benchmark(sizes: tuple[int, ...] = (1_000, 10_000, 50_000)) -> None:
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        points = rng.integers(0, 100_000, size=(n, 3))
+        coords = [tuple(p) for p in points.tolist()]
+
+        if n * (n - 1) // 2 <= BASELINE_MAX_PAIRS:
+            tracemalloc.start()
+            start = perf_counter()
+            pairs = sorted(combinations(coords, 2), key=lambda ab: dist(*ab))
+            pairs = pairs[:NUM_ITERATIONS]
+            elapsed = perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del pairs
+            print(f"n={n}: sorted pairs {elapsed:.2f}s, {peak / 2**20:.0f} MiB")
+        else:
+            print(f"n={n}: sorted pairs skipped ({n * (n - 1) // 2:,} pairs)")
+
+        tracemalloc.start()
+        start = perf_counter()
+        shortest_edges(points, NUM_ITERATIONS)
+        elapsed = perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"n={n}: blocked top-k {elapsed:.2f}s, {peak / 2**20:.0f} MiB")
 
 
 def solve(data: str, *, part2: bool) -> int:
@@ -11,36 +160,22 @@ def solve(data: str, *, part2: bool) -> int:
 
     coords = [tuple(map(int, line.split(","))) for line in data.splitlines()]
 
-    # first sort all pairs by distance
-    pairs = sorted(
-        combinations(coords, 2),
-        key=lambda ab: dist(*ab),
-    )
+    # part 1 needs a fixed number of edges, part 2 stops once all are joined
+    edges = iter_edges(coords) if part2 else shortest_edges(np.array(coords), n)
 
-    circuits = [{coord} for coord in coords]
-    for k, (mina, minb) in enumerate(pairs):
+    circuits = UnionFind(len(coords))
+    for k, (_, a, b) in enumerate(edges):
         if k == n:
             break
 
-        ca = cb = set()
-        for c in circuits:
-            if mina in c:
-                ca = c
-            if minb in c:
-                cb = c
-
         # already in same circuit, nothing to do
-        if ca is cb:
+        if not circuits.union(a, b):
             continue
 
-        new_circuit = ca | cb
-        circuits = [c for c in circuits if c not in (ca, cb)]
-        circuits.append(new_circuit)
+        if part2 and circuits.components == 1:
+            return coords[a][0] * coords[b][0]
 
-        if part2 and len(circuits) == 1:
-            return mina[0] * minb[0]
-
-    sizes = sorted(len(c) for c in circuits)
+    sizes = sorted(circuits.component_sizes())
     return prod(sizes[-3:])
 
 
@@ -55,8 +190,13 @@ def solve_part2(data: str) -> int:
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument("--bench", action="store_true", help="benchmark part 1 edges")
     args = parser.parse_args()
 
+    if args.bench:
+        benchmark()
+        return
+
     input_text = Path(args.path).read_text().strip()
 
     part1_result = solve_part1(input_text)
@@ -1,8 +1,18 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
+import heapq
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
 from pathlib import Path
-from itertools import combinations, pairwise
+from itertools import accumulate, combinations, pairwise
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass(frozen=True)
 class Segment:
@@ -18,11 +28,57 @@ def inclusive_area(a, b):
     return (abs(x2 - x1) + 1) * (abs(y2 - y1) + 1)
 
 
+@dataclass(frozen=True)
+class SearchStats:
+    checked: int
+    pruned: int
+
+
 def solve_part1(data: str) -> int:
     coords = [tuple(map(int, line.split(","))) for line in data.splitlines()]
     return max(inclusive_area(a, b) for a, b in combinations(coords, 2))
 
 
+def staircase_corners(coords: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Keep the points no other point dominates towards some corner.
+
+    Moving a corner further out never shrinks a rectangle, so the largest
+    one always has both corners among these.
+    """
+    corners = set()
+    for sx, sy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+        lowest = None
+        for x, y in sorted((sx * x, sy * y) for x, y in coords):
+            if lowest is None or y < lowest:
+                corners.add((sx * x, sy * y))
+                lowest = y
+    return sorted(corners)
+
+
+def solve_part1_pruned(data: str) -> tuple[int, SearchStats]:
+    coords = [tuple(map(int, line.split(","))) for line in data.splitlines()]
+    corners = staircase_corners(coords)
+    min_x, max_x = min(x for x, _ in corners), max(x for x, _ in corners)
+    min_y, max_y = min(y for _, y in corners), max(y for _, y in corners)
+
+    def bound(a: tuple[int, int]) -> int:
+        # the largest area a could make with the farthest possible partner
+        x, y = a
+        return (max(x - min_x, max_x - x) + 1) * (max(y - min_y, max_y - y) + 1)
+
+    corners.sort(key=bound, reverse=True)
+    max_area = checked = 0
+    for i, a in enumerate(corners):
+        if bound(a) <= max_area:
+            break
+        for b in corners[i + 1 :]:
+            max_area = max(max_area, inclusive_area(a, b))
+        checked += len(corners) - 1 - i
+
+    total = len(coords) * (len(coords) - 1) // 2
+    return max_area, SearchStats(checked, total - checked)
+
+
 def segment_between(a: tuple[int, int], b: tuple[int, int]) -> Segment:
     x1, y1 = a
     x2, y2 = b
@@ -36,94 +92,244 @@ def segment_between(a: tuple[int, int], b: tuple[int, int]) -> Segment:
         raise ValueError("Input guarantees axis-aligned adjacency only")
 
 
-def point_in_polygon(px: float, py: float, edges: list[tuple[int, int]]) -> bool:
-    inside = False
-    for (x1, y1), (x2, y2) in edges:
-        # Ignore horizontal edges for crossing logic
-        if y1 == y2:
-            continue
-        # Does the edge straddle py?
-        if (y1 > py) != (y2 > py):
-            # x coordinate where this edge crosses scanline at y=py
-            x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
-            if x_cross > px:
-                inside = not inside
-    return inside
+class AxisIndex:
+    """Segments of one orientation sorted by fixed, in a merge sort tree."""
+
+    def __init__(self, segments: list[Segment]) -> None:
+        segments = sorted(segments, key=lambda s: s.fixed)
+        self.fixed = [s.fixed for s in segments]
+        self.size = 1
+        while self.size < len(segments):
+            self.size *= 2
 
+        # every node holds its segments' (start, end) pairs sorted by start
+        spans: list[list[tuple[int, int]]] = [[] for _ in range(2 * self.size)]
+        for i, s in enumerate(segments):
+            spans[self.size + i] = [(s.start, s.end)]
+        for node in range(self.size - 1, 0, -1):
+            spans[node] = sorted(spans[2 * node] + spans[2 * node + 1])
 
-def polygon_crosses_rect_interior(
-    x1: int, y1: int, x2: int, y2: int, segments: list[Segment]
+        self.starts = [[start for start, _ in span] for span in spans]
+        self.ends = [sorted(end for _, end in span) for span in spans]
+        # running max of end over the segments in start order
+        self.max_ends = [
+            list(accumulate((end for _, end in span), max)) for span in spans
+        ]
+
+    def _nodes(self, lo: int, hi: int) -> Iterator[int]:
+        """Yield the tree nodes that exactly cover segments lo..hi - 1."""
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                yield lo
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                yield hi
+            lo //= 2
+            hi //= 2
+
+    def any_overlap(
+        self, fixed_lo: float, fixed_hi: float, lo: float, hi: float
+    ) -> bool:
+        """Does a segment with fixed_lo < fixed < fixed_hi overlap (lo, hi)?"""
+        first = bisect_right(self.fixed, fixed_lo)
+        last = bisect_left(self.fixed, fixed_hi)
+        for node in self._nodes(first, last):
+            # of the segments starting before hi, does any end after lo?
+            k = bisect_left(self.starts[node], hi)
+            if k and self.max_ends[node][k - 1] > lo:
+                return True
+        return False
+
+    def count_stabbed(self, fixed_lo: float, at: float) -> int:
+        """Count segments with fixed > fixed_lo and start <= at < end."""
+        first = bisect_right(self.fixed, fixed_lo)
+        return sum(
+            bisect_right(self.starts[node], at) - bisect_right(self.ends[node], at)
+            for node in self._nodes(first, len(self.fixed))
+        )
+
+
+class SegmentIndex:
+    def __init__(self, segments: list[Segment]) -> None:
+        self.vertical = AxisIndex([s for s in segments if s.vertical])
+        self.horizontal = AxisIndex([s for s in segments if not s.vertical])
+
+    def contains_point(self, px: float, py: float) -> bool:
+        # cast a ray to the right and count the vertical edges it crosses
+        return self.vertical.count_stabbed(px, py) % 2 == 1
+
+    def crosses_rect_interior(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        return self.vertical.any_overlap(x1, x2, y1, y2) or self.horizontal.any_overlap(
+            y1, y2, x1, x2
+        )
+
+
+def rectangle_area(a: tuple[int, int], b: tuple[int, int]) -> int:
+    # skip non-rectangles (need different x AND y)
+    if a[0] == b[0] or a[1] == b[1]:
+        return 0
+    return inclusive_area(a, b)
+
+
+def rectangle_inside(
+    index: SegmentIndex, a: tuple[int, int], b: tuple[int, int]
 ) -> bool:
-    for s in segments:
-        if s.vertical:
-            x = s.fixed
-            if x1 < x < x2:
-                # overlap of (y1, y2) with [start, end]
-                if max(s.start, y1) < min(s.end, y2):
-                    return True
-        else:
-            y = s.fixed
-            if y1 < y < y2:
-                # overlap of (x1, x2) with [start, end]
-                if max(s.start, x1) < min(s.end, x2):
-                    return True
-    return False
+    x1, x2 = sorted((a[0], b[0]))
+    y1, y2 = sorted((a[1], b[1]))
 
+    # 1) center must be inside polygon
+    cx = (x1 + x2) / 2.0
+    cy = (y1 + y2) / 2.0
+    if not index.contains_point(cx, cy):
+        return False
 
-def solve_part2(data: str) -> int:
+    # 2) polygon must not cross interior of rectangle
+    return not index.crosses_rect_interior(x1, y1, x2, y2)
+
+
+def polygon_index(coords: list[tuple[int, int]]) -> SegmentIndex:
+    edges = pairwise(coords + [coords[0]])
+    return SegmentIndex([segment_between(a, b) for a, b in edges])
+
+
+def solve_part2_scan(data: str) -> int:
     coords = [tuple(map(int, line.split(","))) for line in data.splitlines()]
-    edges = list(pairwise(coords + [coords[0]]))
-    segments: list[Segment] = [segment_between(a, b) for a, b in edges]
+    index = polygon_index(coords)
     max_area = 0
 
     for a, b in combinations(coords, 2):
-        x1, y1 = a
-        x2, y2 = b
-
-        # skip non-rectangles (need different x AND y)
-        if x1 == x2 or y1 == y2:
+        area = rectangle_area(a, b)
+        if area <= max_area:
             continue
 
-        # normalize
-        if x1 > x2:
-            x1, x2 = x2, x1
-        if y1 > y2:
-            y1, y2 = y2, y1
+        if rectangle_inside(index, a, b):
+            max_area = area
 
-        dx = x2 - x1
-        dy = y2 - y1
-        area = (dx + 1) * (dy + 1)
+    return max_area
 
-        if area <= max_area:
-            continue
 
-        # 1) center must be inside polygon
-        cx = (x1 + x2) / 2.0
-        cy = (y1 + y2) / 2.0
-        if not point_in_polygon(cx, cy, edges):
-            continue
+def outside_prefix(
+    coords: list[tuple[int, int]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compress the polygon and prefix-sum its outside cells.
+
+    Cell (b, a) spans xs[a]..xs[a + 1] by ys[b]..ys[b + 1], and no edge runs
+    through a cell, so each one is entirely inside or outside.
+    """
+    xs = np.unique([x for x, _ in coords])
+    ys = np.unique([y for _, y in coords])
+
+    # a vertical edge flips inside/outside for every cell row it spans, so mark
+    # its ends and accumulate the flips down the rows and then across them
+    flips = np.zeros((len(ys), len(xs)), dtype=np.uint8)
+    for (x1, y1), (x2, y2) in pairwise(coords + [coords[0]]):
+        if x1 == x2:
+            a = np.searchsorted(xs, x1)
+            flips[np.searchsorted(ys, y1), a] ^= 1
+            flips[np.searchsorted(ys, y2), a] ^= 1
+    inside = np.bitwise_xor.accumulate(np.bitwise_xor.accumulate(flips, axis=0), axis=1)
+    outside = 1 - inside[:-1, :-1].astype(np.int64)
+
+    prefix = np.zeros((len(ys), len(xs)), dtype=np.int64)
+    prefix[1:, 1:] = outside.cumsum(axis=0).cumsum(axis=1)
+    return xs, ys, prefix
+
+
+def inside_areas(
+    points: np.ndarray,
+    cols: np.ndarray,
+    rows: np.ndarray,
+    prefix: np.ndarray,
+    i: int,
+) -> np.ndarray:
+    """Areas of vertex i with every later vertex, 0 unless wholly inside."""
+    a1, a2 = np.minimum(cols[i], cols[i + 1 :]), np.maximum(cols[i], cols[i + 1 :])
+    b1, b2 = np.minimum(rows[i], rows[i + 1 :]), np.maximum(rows[i], rows[i + 1 :])
+    outside = prefix[b2, a2] - prefix[b1, a2] - prefix[b2, a1] + prefix[b1, a1]
+    # skip non-rectangles (need different x AND y)
+    valid = (outside == 0) & (a1 != a2) & (b1 != b2)
+    dx, dy = np.abs(points[i + 1 :] - points[i]).T
+    return np.where(valid, (dx + 1) * (dy + 1), 0)
 
-        # 2) polygon must not cross interior of rectangle
-        if polygon_crosses_rect_interior(x1, y1, x2, y2, segments):
-            continue
 
-        max_area = area
+def largest_inside_rectangle(coords: list[tuple[int, int]]) -> int:
+    xs, ys, prefix = outside_prefix(coords)
+    points = np.array(coords, dtype=np.int64)
+    cols = np.searchsorted(xs, points[:, 0])
+    rows = np.searchsorted(ys, points[:, 1])
 
+    max_area = 0
+    for i in range(len(coords) - 1):
+        max_area = max(max_area, int(inside_areas(points, cols, rows, prefix, i).max()))
     return max_area
 
 
+def solve_part2_pruned(data: str) -> tuple[int, SearchStats]:
+    """Check vertices best-first by their largest area and stop at a fit.
+
+    A vertex is first queued with an upper bound from the extent of the
+    vertices after it. Popping it checks all its partners at once against
+    the prefix sums and requeues it with its largest fitting area, which is
+    exact, so the first exact entry popped wins.
+    """
+    coords = [tuple(map(int, line.split(","))) for line in data.splitlines()]
+    xs, ys, prefix = outside_prefix(coords)
+    points = np.array(coords, dtype=np.int64)
+    cols = np.searchsorted(xs, points[:, 0])
+    rows = np.searchsorted(ys, points[:, 1])
+    n = len(coords)
+    total = n * (n - 1) // 2
+
+    # the largest area a vertex could make with the farthest possible partner
+    later = points[::-1]
+    low = np.minimum.accumulate(later)[::-1]
+    high = np.maximum.accumulate(later)[::-1]
+    extent = np.maximum(points[:-1] - low[1:], high[1:] - points[:-1]) + 1
+    heap = [(-bound, i, False) for i, bound in enumerate(extent.prod(axis=1).tolist())]
+    heapq.heapify(heap)
+
+    checked = 0
+    while heap and heap[0][0] < 0:
+        neg_area, i, exact = heapq.heappop(heap)
+        if exact:
+            return -neg_area, SearchStats(checked, total - checked)
+        checked += n - 1 - i
+        best = int(inside_areas(points, cols, rows, prefix, i).max())
+        heapq.heappush(heap, (-best, i, True))
+
+    return 0, SearchStats(checked, total - checked)
+
+
+def solve_part2(data: str) -> int:
+    coords = [tuple(map(int, line.split(","))) for line in data.splitlines()]
+    return largest_inside_rectangle(coords)
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument(
+        "--pruned", action="store_true", help="best-first search with pruning stats"
+    )
     args = parser.parse_args()
 
     input_text = Path(args.path).read_text().strip()
 
-    part1_result = solve_part1(input_text)
+    if args.pruned:
+        part1_result, stats1 = solve_part1_pruned(input_text)
+        part2_result, stats2 = solve_part2_pruned(input_text)
+        for part, stats in enumerate((stats1, stats2), 1):
+            print(f"Part {part} pairs: {stats.checked} checked, {stats.pruned} pruned")
+    else:
+        part1_result = solve_part1(input_text)
+        part2_result = solve_part2(input_text)
+
     print(f"Part 1: {part1_result}")
     assert part1_result == 4746238001
 
-    part2_result = solve_part2(input_text)
     print(f"Part 2: {part2_result}")
     assert part2_result == 1552139370
 
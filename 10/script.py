@@ -1,13 +1,86 @@
-# /// script
-# dependencies = [
-#   "z3-solver",
-# ]
-# ///
 import argparse
-from itertools import combinations
+from collections.abc import Callable, Iterator
+from functools import cache
+from importlib.util import find_spec
 from pathlib import Path
-
-import z3  # type: ignore
+from time import perf_counter
+
+Button = tuple[int, ...]
+
+# past this many null space vectors the parity walk slows down exponentially,
+# so hand over to z3 when it is installed
+MAX_NULL_SPACE = 4
+
+
+def fewest_presses_bfs(target: int, buttons: list[int]) -> int:
+    """Breadth-first search over the light states reachable from all off."""
+    seen = {0}
+    frontier = [0]
+    presses = 0
+    while target not in seen:
+        if not frontier:
+            raise ValueError("No solution found")
+        next_frontier = []
+        for state in frontier:
+            for button in buttons:
+                if state ^ button not in seen:
+                    seen.add(state ^ button)
+                    next_frontier.append(state ^ button)
+        frontier = next_frontier
+        presses += 1
+    return presses
+
+
+class XorSystem:
+    """Buttons reduced over GF(2), for finding which combinations XOR to a target."""
+
+    def __init__(self, buttons: list[int]) -> None:
+        self.size = len(buttons)
+        # pivot bit -> (reduced vector, buttons combined into it)
+        self.basis: dict[int, tuple[int, int]] = {}
+        self.null_space = []
+        for b, button in enumerate(buttons):
+            vector, combo = self.reduce(button, 1 << b)
+            if vector:
+                self.basis[vector.bit_length() - 1] = (vector, combo)
+            else:
+                self.null_space.append(combo)
+
+    def reduce(self, vector: int, combo: int) -> tuple[int, int]:
+        while vector:
+            pivot = vector.bit_length() - 1
+            if pivot not in self.basis:
+                break
+            vector ^= self.basis[pivot][0]
+            combo ^= self.basis[pivot][1]
+        return vector, combo
+
+    def solutions(self, target: int) -> Iterator[int]:
+        """Yield every combination of buttons whose XOR is target."""
+        remainder, presses = self.reduce(target, 0)
+        if remainder:
+            return
+        # every solution is the particular one plus some null space combination,
+        # walk them in Gray code order so each step flips a single vector
+        yield presses
+        for i in range(1, 1 << len(self.null_space)):
+            presses ^= self.null_space[(i & -i).bit_length() - 1]
+            yield presses
+
+
+def min_weight_solution(target: int, buttons: list[int]) -> int:
+    """Fewest buttons whose XOR is target, by elimination over GF(2)."""
+    system = XorSystem(buttons)
+    if len(system.null_space) > len(system.basis) + len(buttons).bit_length():
+        # fewer reachable states than null space combinations
+        return fewest_presses_bfs(target, buttons)
+
+    best = min(
+        (presses.bit_count() for presses in system.solutions(target)), default=None
+    )
+    if best is None:
+        raise ValueError("No solution found")
+    return best
 
 
 def solve_machine(machine: str) -> int:
@@ -17,29 +90,26 @@ def solve_machine(machine: str) -> int:
         tuple(map(int, t.strip("()").split(","))) for t in tokens if t.startswith("(")
     ]
 
-    initial = list(lights)
-    m = len(buttons)
-
-    for n in range(m + 1):  # 0 .. m presses
-        for idxs in combinations(range(m), n):
-            state = initial[:]
-            for i in idxs:
-                for pos in buttons[i]:
-                    state[pos] = "#" if state[pos] == "." else "."
-            if all(c == "." for c in state):
-                return n
-    raise ValueError("No solution found")
+    target = sum(1 << pos for pos, c in enumerate(lights) if c == "#")
+    masks = [sum(1 << pos for pos in button) for button in buttons]
+    return min_weight_solution(target, masks)
 
 
 def solve_part1(data: str) -> int:
     return sum(solve_machine(machine) for machine in data.splitlines())
 
 
-def min_presses_ilp(machine: str) -> int:
+def parse_joltage_machine(machine: str) -> tuple[list[Button], list[int]]:
     lights, *tokens, target_str = machine.split()
 
     buttons = [tuple(map(int, t.strip("()").split(","))) for t in tokens]
     target = list(map(int, target_str.strip("{}").split(",")))
+    return buttons, target
+
+
+def min_presses_z3(buttons: list[Button], target: list[int]) -> int:
+    import z3  # type: ignore  # optional, from z3-solver
+
     o = z3.Optimize()  # optimization context
 
     vars = z3.Ints(f"n{i}" for i in range(len(buttons)))
@@ -58,13 +128,108 @@ def min_presses_ilp(machine: str) -> int:
     return o.model().eval(sum(vars)).as_long()
 
 
-def solve_part2(data: str) -> int:
-    return sum(min_presses_ilp(machine) for machine in data.splitlines())
+def min_presses_elimination(buttons: list[Button], target: list[int]) -> int:
+    """Fix the parity of every button's presses, then halve what is left.
+
+    Pressing a button x times is x % 2 presses plus 2 * (x // 2), so the odd
+    presses must switch exactly the odd counters, a GF(2) system whose
+    solutions are walked from its null space, and the halves solve the
+    remaining joltages divided by two.
+    """
+    system = XorSystem([sum(1 << i for i in button) for button in buttons])
+    if len(system.null_space) > MAX_NULL_SPACE and find_spec("z3"):
+        return min_presses_z3(buttons, target)
+
+    # pack the joltages into one int, a field of width bits per counter whose
+    # top bit is a guard, so subtracting and halving work on all of them at once
+    width = max([*target, len(buttons)]).bit_length() + 1
+    guards = sum(1 << (i * width + width - 1) for i in range(len(target)))
+    low_bits = sum(1 << (i * width) for i in range(len(target)))
+
+    def pack(values) -> int:
+        return sum(value << (i * width) for i, value in enumerate(values))
+
+    # joltage added by each button, keyed by its bit in a combination
+    packed = {
+        1 << b: pack(int(i in button) for i in range(len(target)))
+        for b, button in enumerate(buttons)
+    }
+
+    @cache
+    def moves(parity: int) -> list[tuple[int, int]]:
+        """(presses, packed joltage added) per distinct effect of the odd presses."""
+        odd = sum(1 << i for i in range(len(target)) if parity >> (i * width) & 1)
+        cheapest: dict[int, int] = {}
+        for combo in system.solutions(odd):
+            effect, cost = 0, combo.bit_count()
+            while combo:
+                effect += packed[combo & -combo]
+                combo &= combo - 1
+            cheapest[effect] = min(cheapest.get(effect, cost), cost)
+        return sorted((cost, effect) for effect, cost in cheapest.items())
+
+    @cache
+    def presses(joltages: int) -> int | None:
+        if not joltages:
+            return 0
+        best = None
+        for cost, effect in moves(joltages & low_bits):
+            if best is not None and cost >= best:
+                break  # moves come cheapest first
+            rest = (joltages | guards) - effect
+            if rest & guards != guards:
+                continue  # some counter would go negative
+            # the odd presses leave every counter even, so halve them all
+            halves = presses((rest ^ guards) >> 1)
+            if halves is not None and (best is None or cost + 2 * halves < best):
+                best = cost + 2 * halves
+        return best
+
+    best = presses(pack(target))
+    if best is None:
+        raise ValueError("No solution found")
+    return best
+
+
+BACKENDS: dict[str, Callable[[list[Button], list[int]], int]] = {
+    "elimination": min_presses_elimination,
+    "z3": min_presses_z3,
+}
+
+
+def min_presses_ilp(machine: str, backend: str = "elimination") -> int:
+    return BACKENDS[backend](*parse_joltage_machine(machine))
+
+
+def slow_path_note(machine: str, backend: str) -> str:
+    """Flag machines the elimination backend hands over or walks slowly."""
+    if backend != "elimination":
+        return ""
+    buttons, _ = parse_joltage_machine(machine)
+    null_space = len(XorSystem([sum(1 << i for i in b) for b in buttons]).null_space)
+    if null_space <= MAX_NULL_SPACE:
+        return ""
+    if find_spec("z3"):
+        return f" (null space {null_space}, handed to z3)"
+    return f" (null space {null_space}, slow path, install z3-solver)"
+
+
+def solve_part2(data: str, backend: str = "elimination", timing: bool = False) -> int:
+    total = 0
+    for i, machine in enumerate(data.splitlines()):
+        start = perf_counter()
+        total += min_presses_ilp(machine, backend)
+        if timing:
+            elapsed = (perf_counter() - start) * 1000
+            print(f"machine {i}: {elapsed:.2f} ms{slow_path_note(machine, backend)}")
+    return total
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument("--backend", choices=BACKENDS, default="elimination")
+    parser.add_argument("--timing", action="store_true", help="time every machine")
     args = parser.parse_args()
 
     input_text = Path(args.path).read_text().strip()
@@ -73,7 +238,7 @@ def main():
     print(f"Part 1: {part1_result}")
     assert part1_result == 441
 
-    part2_result = solve_part2(input_text)
+    part2_result = solve_part2(input_text, args.backend, args.timing)
     print(f"Part 2: {part2_result}")
     assert part2_result == 18559
 
@@ -1,7 +1,18 @@
+# /// script
+# dependencies = [
+#   "numpy",
+# ]
+# ///
 import argparse
 from collections import defaultdict
-from functools import cache
+from collections.abc import Iterable
+from itertools import pairwise
+from math import prod
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
 
 
 def parse_graph(data: str) -> dict[str, list[str]]:
@@ -12,25 +23,240 @@ def parse_graph(data: str) -> dict[str, list[str]]:
     return graph
 
 
-def solve(data: str, part2: bool = False) -> int:
-    graph = parse_graph(data)
-    start = "svr" if part2 else "you"
-    target = "out"
+def topological_order(graph: dict[str, list[str]]) -> list[str]:
+    """Order every node before its children, or raise if the graph has a cycle."""
+    indegree = dict.fromkeys(graph, 0)
+    for children in graph.values():
+        for child in children:
+            indegree[child] = indegree.get(child, 0) + 1
+
+    order = [node for node, degree in indegree.items() if degree == 0]
+    for node in order:
+        for child in graph.get(node, ()):
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                order.append(child)
+
+    if len(order) < len(indegree):
+        stuck = sorted(node for node, degree in indegree.items() if degree)
+        raise ValueError(f"Graph has a cycle, unordered nodes: {', '.join(stuck[:5])}")
+    return order
+
+
+def count_paths(
+    graph: dict[str, list[str]],
+    start: str,
+    target: str,
+    must_visit: Iterable[str] = (),
+) -> int:
+    """Count start -> target paths through every must-visit node.
+
+    Nodes get integer IDs in topological order and path counts are pushed
+    forward through a flat table indexed by (node, mask of required nodes
+    seen so far), so the work is O((V + E) * 2^k).
+    """
+    order = topological_order(graph)
+    ids = {node: i for i, node in enumerate(order)}
+    must_visit = list(dict.fromkeys(must_visit))
+    if start not in ids or target not in ids or not set(must_visit) <= ids.keys():
+        return 0
+
+    bits = [0] * len(order)
+    for i, node in enumerate(must_visit):
+        bits[ids[node]] = 1 << i
+    size = 1 << len(must_visit)
+    ways = [0] * (len(order) * size)
+
+    first, last = ids[start], ids[target]
+    ways[first * size + bits[first]] = 1
+    # nodes before start can't be reached and nodes after target can't reach it
+    for node in range(first, last):
+        row = ways[node * size : (node + 1) * size]
+        if not any(row):
+            continue
+        for child in graph.get(order[node], ()):
+            child_id = ids[child]
+            base, bit = child_id * size, bits[child_id]
+            for mask, paths in enumerate(row):
+                if paths:
+                    ways[base + (mask | bit)] += paths
+
+    return ways[last * size + size - 1]
+
+
+class CompiledGraph:
+    """A parsed device graph with interned, topologically ordered node IDs.
+
+    Children live in CSR form: those of node i are
+    children[offsets[i] : offsets[i + 1]], and every child ID is larger
+    than its parent's.
+    """
+
+    def __init__(self, names: list[str], offsets: np.ndarray, children: np.ndarray):
+        self.names = names
+        self.offsets = offsets
+        self.children = children
+        self.ids = {name: i for i, name in enumerate(names)}
+        # paths from every node to a target, built once per target
+        self._paths_to: dict[int, list[int]] = {}
+
+    @classmethod
+    def from_text(cls, data: str) -> "CompiledGraph":
+        ids: dict[str, int] = {}
+        parents, children = [], []
+        for line in data.splitlines():
+            parent, children_str = line.split(": ")
+            parent_id = ids.setdefault(parent, len(ids))
+            for child in children_str.split():
+                parents.append(parent_id)
+                children.append(ids.setdefault(child, len(ids)))
+        return cls.from_edges(
+            list(ids), np.array(parents, dtype=np.int64), np.array(children, np.int64)
+        )
+
+    @classmethod
+    def from_edges(
+        cls, names: list[str], parents: np.ndarray, children: np.ndarray
+    ) -> "CompiledGraph":
+        """Build the CSR arrays, renumbering nodes into topological order."""
+        offsets, children = csr(len(names), parents, children)
+        rank = np.empty(len(names), dtype=np.int64)
+        rank[csr_topological_order(offsets, children)] = np.arange(len(names))
+
+        offsets, children = csr(
+            len(names), np.repeat(rank, np.diff(offsets)), rank[children]
+        )
+        ordered = [""] * len(names)
+        for name, i in zip(names, rank.tolist()):
+            ordered[i] = name
+        return cls(ordered, offsets, children)
+
+    def save(self, path: str | Path) -> None:
+        np.savez(
+            path,
+            names=np.array(self.names),
+            offsets=self.offsets,
+            children=self.children,
+        )
 
-    must_visit = {"dac", "fft"} if part2 else set()
+    @classmethod
+    def load(cls, path: str | Path) -> "CompiledGraph":
+        with np.load(path) as arrays:
+            return cls(arrays["names"].tolist(), arrays["offsets"], arrays["children"])
 
-    @cache
-    def count(node: str, visited: frozenset[str]) -> int:
-        if node in must_visit:
-            visited = visited | {node}
+    def paths_to(self, target: int) -> list[int]:
+        """Number of paths from every node to target, filled in reverse order."""
+        if target not in self._paths_to:
+            offsets, children = self.offsets.tolist(), self.children.tolist()
+            ways = [0] * len(self.names)
+            ways[target] = 1
+            # only nodes before target in the order can reach it
+            for node in range(target - 1, -1, -1):
+                ways[node] = sum(
+                    ways[child] for child in children[offsets[node] : offsets[node + 1]]
+                )
+            self._paths_to[target] = ways
+        return self._paths_to[target]
 
-        if node == target:
-            # only count paths where we've seen all required nodes
-            return int(must_visit.issubset(visited))
+    def count_paths(
+        self, start: str, target: str, must_visit: Iterable[str] = ()
+    ) -> int:
+        """Count start -> target paths through every must-visit node.
 
-        return sum(count(child, visited) for child in graph[node])
+        In a DAG such a path meets the required nodes in topological order,
+        so the count is a product of plain path counts between neighbours.
+        """
+        stops = {start, target, *must_visit}
+        if not stops <= self.ids.keys():
+            return 0
+        first, last = self.ids[start], self.ids[target]
+        stops = sorted(self.ids[node] for node in stops)
+        if stops[0] != first or stops[-1] != last:
+            return 0
+        return prod(self.paths_to(b)[a] for a, b in pairwise(stops))
 
-    return count(start, frozenset())
+    def count_many(
+        self, queries: Iterable[tuple[str, str, Iterable[str]]]
+    ) -> list[int]:
+        """Answer (start, target, must-visit) queries, sharing per-target tables."""
+        return [self.count_paths(*query) for query in queries]
+
+
+def csr(
+    n: int, parents: np.ndarray, children: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(parents, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(parents, minlength=n), out=offsets[1:])
+    return offsets, children[order]
+
+
+def csr_topological_order(offsets: np.ndarray, children: np.ndarray) -> list[int]:
+    """Kahn's algorithm over CSR arrays, raising if the graph has a cycle."""
+    indegree = np.bincount(children, minlength=len(offsets) - 1).tolist()
+    offsets, children = offsets.tolist(), children.tolist()
+    order = [node for node, degree in enumerate(indegree) if degree == 0]
+    for node in order:
+        for child in children[offsets[node] : offsets[node + 1]]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                order.append(child)
+
+    if len(order) < len(indegree):
+        raise ValueError(
+            f"Graph has a cycle, {len(indegree) - len(order)} nodes unordered"
+        )
+    return order
+
+
+def random_graph_text(edges: int, seed: int = 0) -> str:
+    """A random DAG in the puzzle's format, each node pointing to later ones."""
+    rng = np.random.default_rng(seed)
+    n = max(2, edges // 4)
+    parents = np.sort(rng.integers(0, n - 1, size=edges))
+    children = parents + 1 + rng.integers(0, 2**62, size=edges) % (n - 1 - parents)
+    lines = []
+    bounds = np.flatnonzero(np.diff(parents)) + 1
+    for group in np.split(np.stack([parents, children], axis=1), bounds):
+        children_str = " ".join(f"n{child}" for child in group[:, 1].tolist())
+        lines.append(f"n{group[0, 0]}: {children_str}")
+    rng.shuffle(lines)
+    return "\n".join(lines)
+
+
+def benchmark(edges: int) -> None:
+    data = random_graph_text(edges)
+    start = perf_counter()
+    graph = CompiledGraph.from_text(data)
+    compiled = perf_counter() - start
+    with TemporaryDirectory() as tmp:
+        start = perf_counter()
+        graph.save(Path(tmp, "graph.npz"))
+        graph = CompiledGraph.load(Path(tmp, "graph.npz"))
+        reloaded = perf_counter() - start
+    start = perf_counter()
+    graph.paths_to(len(graph.names) - 1)
+    table = perf_counter() - start
+    print(
+        f"{edges} edges, {len(graph.names)} nodes: parse+compile {compiled:.2f}s,"
+        f" save+load {reloaded:.2f}s, paths-to table {table:.2f}s"
+    )
+
+
+def parse_queries(block: str) -> list[tuple[str, str, list[str]]]:
+    """Parse lines like "svr out dac fft" (start, target, must-visit...)."""
+    queries = []
+    for line in block.splitlines():
+        start, target, *must_visit = line.split()
+        queries.append((start, target, must_visit))
+    return queries
+
+
+def solve(data: str, part2: bool = False) -> int:
+    graph = parse_graph(data)
+    start = "svr" if part2 else "you"
+    must_visit = ("dac", "fft") if part2 else ()
+    return count_paths(graph, start, "out", must_visit)
 
 
 def solve_part1(data: str) -> int:
@@ -44,15 +270,40 @@ def solve_part2(data: str) -> int:
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument(
+        "--compiled", action="store_true", help="path is a graph saved with --save"
+    )
+    parser.add_argument("--save", metavar="NPZ", help="save the compiled graph")
+    parser.add_argument(
+        "--queries", metavar="FILE", help="lines of: start target [must-visit...]"
+    )
+    parser.add_argument("--bench", type=int, metavar="EDGES", help="run a benchmark")
     args = parser.parse_args()
 
-    input_text = Path(args.path).read_text().strip()
+    if args.bench:
+        benchmark(args.bench)
+        return
+
+    if args.compiled:
+        graph = CompiledGraph.load(args.path)
+    else:
+        graph = CompiledGraph.from_text(Path(args.path).read_text().strip())
+    if args.save:
+        graph.save(args.save)
+
+    if args.queries:
+        queries = parse_queries(Path(args.queries).read_text().strip())
+        for query, paths in zip(queries, graph.count_many(queries)):
+            print(f"{' '.join([query[0], query[1], *query[2]])}: {paths}")
+        return
+
+    part1_result, part2_result = graph.count_many(
+        [("you", "out", ()), ("svr", "out", ("dac", "fft"))]
+    )
 
-    part1_result = solve_part1(input_text)
     print(f"Part 1: {part1_result}")
     assert part1_result == 724
 
-    part2_result = solve_part2(input_text)
     print(f"Part 2: {part2_result}")
     assert part2_result == 473930047491888
 
@@ -1,18 +1,19 @@
-# /// script
-# dependencies = [
-#   "polyomino"
-# ]
-# ///
 import argparse
+from collections.abc import Callable
+from dataclasses import dataclass
 from functools import cache
 from pathlib import Path
-
-from polyomino.board import Rectangle
-from polyomino.error import CantPlaceSinglePiece
-from polyomino.tileset import CoverWithWrongModulus, CoverWithWrongSize, any_number_of
+from time import perf_counter
 
 Cell = tuple[int, int]
 Counts = tuple[int, int, int, int, int, int]
+# (shape index, bitmask of covered cells, canonical under the board's symmetries)
+Placement = tuple[int, int, bool]
+
+# how many search steps pass between deadline checks
+DEADLINE_STEPS = 4096
+# the shape index of a cell left empty
+EMPTY = -1
 
 
 def parse_shapes(text: str) -> list[frozenset[Cell]]:
@@ -43,41 +44,201 @@ def parse_region_lines(text: str) -> list[tuple[int, int, list[int]]]:
     return [_parse_line(line) for line in blocks[-1].splitlines()]
 
 
-def solve(data: str) -> int:
+def normalize(cells: set[Cell]) -> frozenset[Cell]:
+    min_x = min(x for x, _ in cells)
+    min_y = min(y for _, y in cells)
+    return frozenset((x - min_x, y - min_y) for x, y in cells)
+
+
+def orientations(shape: frozenset[Cell]) -> list[frozenset[Cell]]:
+    """Every distinct rotation and reflection of a shape, moved to the origin."""
+    found = []
+    for flip in (False, True):
+        cells = {(-x, y) for x, y in shape} if flip else set(shape)
+        for _ in range(4):
+            cells = {(-y, x) for x, y in cells}
+            oriented = normalize(cells)
+            if oriented not in found:
+                found.append(oriented)
+    return found
+
+
+def board_symmetries(w: int, h: int) -> list[Callable[[int, int], Cell]]:
+    """Maps of a w x h board onto itself, the identity first."""
+    maps = [
+        lambda x, y: (x, y),
+        lambda x, y: (w - 1 - x, y),
+        lambda x, y: (x, h - 1 - y),
+        lambda x, y: (w - 1 - x, h - 1 - y),
+    ]
+    if w == h:
+        maps += [lambda x, y, f=f: f(y, x) for f in maps]
+    return maps
+
+
+def placements(shapes: list[frozenset[Cell]], w: int, h: int) -> list[list[Placement]]:
+    """Every placement of every shape on the board, grouped by its lowest cell.
+
+    Cell (x, y) is bit y * w + x. A placement is canonical when no symmetry
+    of the board maps it to a smaller mask.
+    """
+    symmetries = board_symmetries(w, h)
+    by_cell: list[list[Placement]] = [[] for _ in range(w * h)]
+    for index, shape in enumerate(shapes):
+        for oriented in orientations(shape) if shape else []:
+            width = max(x for x, _ in oriented) + 1
+            height = max(y for _, y in oriented) + 1
+            for dy in range(h - height + 1):
+                for dx in range(w - width + 1):
+                    cells = [(x + dx, y + dy) for x, y in oriented]
+                    masks = [
+                        sum(1 << y * w + x for x, y in (f(*cell) for cell in cells))
+                        for f in symmetries
+                    ]
+                    mask = masks[0]
+                    lowest = (mask & -mask).bit_length() - 1
+                    by_cell[lowest].append((index, mask, mask == min(masks)))
+    return by_cell
+
+
+def pack(
+    by_cell: list[list[Placement]],
+    sizes: list[int],
+    counts: list[int],
+    deadline: float | None = None,
+) -> bool | None:
+    """Fit the pieces on the board, leaving any cells empty; None on timeout.
+
+    The search always settles the lowest open cell: a piece placement must
+    start there, or the cell stays empty while there is room to spare.
+    Identical pieces are only told apart by how many remain, so their orders
+    are never tried twice, and when some shape has a single piece it only
+    takes canonical placements, which skips mirrored copies of the board.
+    """
+    counts = list(counts)
+    remaining = sum(c * size for c, size in zip(counts, sizes))
+    slack = len(by_cell) - remaining
+    if slack < 0:
+        return False
+    single = next((i for i, c in enumerate(counts) if c == 1), None)
+
+    board = 0
+    # per settled cell: the options still to try and the one applied
+    stack: list[tuple[list[Placement], Placement | None]] = []
+    steps = 0
+    while remaining:
+        steps += 1
+        if deadline is not None and steps % DEADLINE_STEPS == 0:
+            if perf_counter() > deadline:
+                return None
+
+        cell = (~board & (board + 1)).bit_length() - 1
+        # leaving the cell empty is popped last, after every piece has been tried
+        options = [(EMPTY, 1 << cell, True)] if slack else []
+        options += [
+            (index, mask, canonical)
+            for index, mask, canonical in by_cell[cell]
+            if counts[index] and not mask & board and (canonical or index != single)
+        ]
+        stack.append((options, None))
+
+        while stack:
+            options, applied = stack.pop()
+            if applied is not None:
+                index, mask, _ = applied
+                board ^= mask
+                if index == EMPTY:
+                    slack += 1
+                else:
+                    counts[index] += 1
+                    remaining += sizes[index]
+            if options:
+                index, mask, _ = option = options.pop()
+                board |= mask
+                if index == EMPTY:
+                    slack -= 1
+                else:
+                    counts[index] -= 1
+                    remaining -= sizes[index]
+                stack.append((options, option))
+                break
+        else:
+            return False
+    return True
+
+
+@dataclass(frozen=True)
+class TierStats:
+    area: int  # more piece cells than board cells, rejected
+    slots: int  # one bounding-box slot per piece, accepted
+    solver: int  # left for the full search
+    timed_out: int  # searches that hit the timeout, counted as not fitting
+
+
+def slot_size(shapes: list[frozenset[Cell]]) -> int:
+    """Side of the smallest square that holds any shape in any orientation."""
+    return max(
+        (
+            max(max(xs) - min(xs), max(ys) - min(ys)) + 1
+            for xs, ys in (zip(*s) for s in shapes if s)
+        ),
+        default=1,
+    )
+
+
+def solve_with_tiers(data: str, timeout: float | None = None) -> tuple[int, TierStats]:
     shapes = parse_shapes(data)
     regions = parse_region_lines(data)
 
-    tiles = tuple(tuple(sorted(s)) for s in shapes)  # stable / hashable
-    mono = [(0, 0)]  # filler for leftover cells
+    sizes = [len(s) for s in shapes]
+    slot = slot_size(shapes)
+    board_placements = cache(lambda w, h: placements(shapes, w, h))
 
     @cache
-    def can_pack(w: int, h: int, counts: Counts) -> bool:
-        board = Rectangle(w, h)
+    def can_pack(w: int, h: int, counts: Counts) -> bool | None:
+        deadline = None if timeout is None else perf_counter() + timeout
+        return pack(board_placements(w, h), sizes, list(counts), deadline)
+
+    total = area = slots = solver = timed_out = 0
+    for w, h, counts in regions:
+        if sum(c * size for c, size in zip(counts, sizes)) > w * h:
+            area += 1
+        elif sum(counts) <= (w // slot) * (h // slot):
+            # every piece gets a box of its own, no search needed
+            slots += 1
+            total += 1
+        else:
+            solver += 1
+            # a transposed board packs the same, so share one orientation
+            packed = can_pack(min(w, h), max(w, h), tuple(counts))
+            timed_out += packed is None
+            total += bool(packed)
+    return total, TierStats(area, slots, solver, timed_out)
 
-        # start with "free filler" so we don't require full cover by the given pieces
-        tileset = any_number_of([mono])
 
-        # add the mandatory multiset of pieces (exactly the counts)
-        for t, c in zip(tiles, counts):
-            if c:
-                tileset = tileset.and_repeated_exactly(c, list(t))
-
-        try:
-            return board.tile_with_set(tileset).solve() is not None
-        except (CoverWithWrongSize, CoverWithWrongModulus, CantPlaceSinglePiece):
-            return False
-
-    return sum(can_pack(w, h, tuple(counts_list)) for w, h, counts_list in regions)
+def solve(data: str) -> int:
+    return solve_with_tiers(data)[0]
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs="?", default=Path(__file__).with_name("in"))
+    parser.add_argument(
+        "--tiers", action="store_true", help="show which check settled each region"
+    )
+    parser.add_argument(
+        "--timeout", type=float, metavar="SECONDS", help="give up on a region after"
+    )
     args = parser.parse_args()
 
     input_text = Path(args.path).read_text().strip()
 
-    result = solve(input_text)
+    result, stats = solve_with_tiers(input_text, args.timeout)
+    if args.tiers:
+        print(
+            f"Regions: {stats.area} rejected by area, {stats.slots} fit in slots,"
+            f" {stats.solver} searched ({stats.timed_out} timed out)"
+        )
     print(f"Part 1: {result}")
     assert result == 479
 